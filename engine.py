@@ -1,23 +1,55 @@
 import csv
-import shlex
+import io
+import sys
 import os
-from typing import List, Dict, Any, Tuple
+import re
+import mmap
+import functools
+from operator import itemgetter
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from types import MappingProxyType
+from itertools import compress, islice, repeat
+from typing import AbstractSet, List, Dict, Any, Callable, Generator, Iterable, Iterator, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+try:
+    import cisv  # type: ignore  # optional SIMD CSV parser
+except ImportError:
+    cisv = None
 
 # ------------------------ Helpers ------------------------
 
+# what int() / float() accept once a cell is stripped; matching first avoids raising per non-numeric cell
+_DIGITS = r'\d+(?:_\d+)*'
+_INT_RE = re.compile(rf'[+-]?{_DIGITS}')
+_FLOAT_RE = re.compile(rf'[+-]?(?:{_DIGITS}\.(?:{_DIGITS})?|\.{_DIGITS})(?:[eE][+-]?{_DIGITS})?')
+# leading non-empty cells looked at to guess whether a column is all integers
+COLUMN_SAMPLE = 256
+
 def try_parse_number(s: str):
     if s is None:
         return None
     s = s.strip()
-    if s == "":
-        return s
-    try:
-        if '.' in s:
-            return float(s)
-        else:
-            return int(s)
-    except:
-        return s
+    if _INT_RE.fullmatch(s):
+        return int(s)
+    if _FLOAT_RE.fullmatch(s):
+        return float(s)
+    return s
+
+def parse_column(cells: Sequence[str]) -> Tuple[Any, ...]:
+    """
+    try_parse_number over a column of trimmed cells. If the sampled cells are all integers the
+    whole column is converted with one map(int); otherwise each cell is classified by regex.
+    """
+    sample = list(islice(filter(None, cells), COLUMN_SAMPLE))
+    if sample and all(map(_INT_RE.fullmatch, sample)):
+        try:
+            return tuple(map(int, cells))
+        except ValueError:
+            # empty or non-integer cells further down
+            pass
+    is_int, is_float = _INT_RE.fullmatch, _FLOAT_RE.fullmatch
+    return tuple([int(c) if is_int(c) else float(c) if is_float(c) else c for c in cells])
 
 def normalize_colname(c: str) -> str:
     return c.strip().lower()
@@ -30,50 +62,268 @@ def unquote_value(token: str) -> str:
 
 # ------------------------ Data Loading ------------------------
 
-def load_csv_table(table_name: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+class Table(NamedTuple):
+    """
+    Column-oriented table: one sequence per column, keyed by normalized name.
+    data   -> trimmed cell text, used for output
+    values -> the same cells run through try_parse_number once at load (see parse_column), used by WHERE
+    kinds  -> per column: 'num' (every cell is a number), 'str' (none is) or 'mixed'
+    folded -> lowercased text of the parsed cells (see fold_cells) of 'str' and 'mixed' columns,
+              what text comparisons compare; 'num' columns are folded on demand (see folded_column)
+    indexes -> equality indexes built on demand (see row_index); None for tables that are not
+               kept around (streamed chunks), where building one would not pay off
+    distinct -> per column, its distinct cells and their parsed values, or None if it has too many
+                (see distinct_cells); like indexes, only kept with cached tables
+    """
+    columns: Sequence[str]
+    nrows: int
+    data: Mapping[str, Sequence[str]]
+    values: Mapping[str, Sequence[Any]]
+    kinds: Mapping[str, str]
+    folded: Mapping[str, Sequence[str]]
+    indexes: Optional[Dict[Tuple[str, str], Dict[Any, List[int]]]] = None
+    distinct: Optional[Dict[str, Optional[Tuple[Tuple[str, ...], Tuple[Any, ...]]]]] = None
+
+def column_kind(values: Sequence[Any]) -> str:
+    n_num = sum(map(isinstance, values, repeat((int, float))))
+    if n_num == len(values):
+        return 'num'
+    return 'str' if n_num == 0 else 'mixed'
+
+def fold_cells(values: Sequence[Any], kind: str = 'mixed') -> Tuple[str, ...]:
+    """str(value).lower() of each parsed cell; in a 'str' column every value already is its text."""
+    if kind == 'str':
+        return tuple(map(str.lower, values))
+    return tuple([str(v).lower() for v in values])
+
+def folded_column(table: "Table", norm_col: str) -> Sequence[str]:
+    folded = table.folded.get(norm_col)
+    return folded if folded is not None else fold_cells(table.values[norm_col])
+
+def find_table_file(table_name: str) -> str:
     candidates = [table_name] if table_name.lower().endswith('.csv') else [table_name, table_name + '.csv']
-    filepath = None
     for c in candidates:
         if os.path.exists(c):
-            filepath = c
-            break
-    if filepath is None:
-        raise FileNotFoundError(f"CSV file '{table_name}' not found.")
-    
-    with open(filepath, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        rows = []
-        columns = reader.fieldnames or []
+            return c
+    raise FileNotFoundError(f"CSV file '{table_name}' not found.")
+
+# abspath -> ((st_mtime_ns, st_size), Table), least recently used first
+TABLE_CACHE_SIZE = 8
+# files at least this big are streamed in chunks (see iter_chunks) instead of loaded + cached
+STREAM_MIN_BYTES = 64 * 1024 * 1024
+CHUNK_ROWS = 100_000
+CHUNK_BYTES = 8 * 1024 * 1024
+# processes a streamed unquoted file is parsed and filtered with, one contiguous byte range each
+SCAN_WORKERS = os.cpu_count() or 1
+# rows sampled per table to estimate how selective each WHERE condition is
+SELECTIVITY_SAMPLE = 1024
+# 'mixed' comparisons run per distinct cell when at most this share of a column's cells are distinct
+DISTINCT_MAX_RATIO = 0.03
+_table_cache: "OrderedDict[str, Tuple[Tuple[int, int], Table]]" = OrderedDict()
+
+def load_csv_table(table_name: str) -> Table:
+    """
+    Load a table, reusing the previous load while the file's mtime and size are unchanged.
+    The returned Table is read-only (tuples and mapping proxies) because it is shared between queries.
+    """
+    filepath = os.path.abspath(find_table_file(table_name))
+    st = os.stat(filepath)
+    stamp = (st.st_mtime_ns, st.st_size)
+    hit = _table_cache.get(filepath)
+    if hit is not None and hit[0] == stamp:
+        _table_cache.move_to_end(filepath)
+        return hit[1]
+    table = read_csv_table(filepath)._replace(indexes={}, distinct={})
+    _table_cache[filepath] = (stamp, table)
+    _table_cache.move_to_end(filepath)
+    while len(_table_cache) > TABLE_CACHE_SIZE:
+        _table_cache.popitem(last=False)
+    return table
+
+def table_from_columns(columns: Tuple[str, ...], col_data: Sequence[Sequence[str]], nrows: int) -> Table:
+    """
+    Build a Table from normalized column names and one sequence of trimmed cells per column.
+    Every column is stored as a tuple, whatever the load path produced, so cached tables stay read-only.
+    """
+    data = {c: tuple(col) for c, col in zip(columns, col_data)}
+    values = {c: parse_column(col) for c, col in data.items()}
+    kinds = {c: column_kind(v) for c, v in values.items()}
+    # lowercase text columns once here instead of per row in every text WHERE
+    folded = {c: fold_cells(values[c], kind) for c, kind in kinds.items() if kind != 'num'}
+    return Table(columns, nrows, MappingProxyType(data), MappingProxyType(values), MappingProxyType(kinds),
+                 MappingProxyType(folded))
+
+def build_table(columns: Tuple[str, ...], body: Sequence[Sequence[str]], trim: bool = False) -> Table:
+    """Build a Table from normalized column names and rows of cells; trim=True strips the cells first."""
+    width = len(columns)
+    body = [r if len(r) == width else (list(r) + [""] * (width - len(r)))[:width] for r in body]
+    # transpose rows into columns in one C-level pass
+    col_data: Sequence[Sequence[str]] = list(zip(*body)) if body else [()] * width
+    if trim:
+        # str.strip mapped over whole columns, not a bound-method lookup and call per cell in Python
+        col_data = [list(map(str.strip, col)) for col in col_data]
+    return table_from_columns(columns, col_data, len(body))
+
+def column_positions(header: Sequence[str], usecols: Optional[AbstractSet[str]]) -> Tuple[Tuple[str, ...], List[int]]:
+    """Normalized names and header positions of the columns to materialize (all if usecols is None)."""
+    columns = [normalize_colname(c) for c in header]
+    positions = [j for j, c in enumerate(columns) if usecols is None or c in usecols]
+    return tuple(columns[j] for j in positions), positions
+
+_LONE_CR = re.compile(rb'\r(?!\n)')
+
+def is_plain_csv(buf: mmap.mmap) -> bool:
+    """True if the file has no quoting and only LF / CRLF line ends, so every ',' and LF byte is a separator."""
+    return buf.find(b'"') == -1 and _LONE_CR.search(buf) is None
+
+def split_plain_columns(block: bytes, positions: List[int]) -> Tuple[int, List[List[str]]]:
+    """
+    Cut a block of unquoted CSV lines into the columns at the given positions. Lines are only
+    split up to the last wanted field, and only wanted fields are decoded and trimmed,
+    one C-level join/decode/split per column.
+    """
+    last = max(positions, default=-1)
+    rows = [line.split(b',', last + 1) for line in block.split(b'\n') if line and line != b'\r']
+    if not rows:
+        return 0, [[] for _ in positions]
+    rows = [r if len(r) > last else r + [b''] * (last + 1 - len(r)) for r in rows]
+    cols = [list(map(str.strip, b'\n'.join(map(itemgetter(j), rows)).decode('utf-8').split('\n')))
+            for j in positions]
+    return len(rows), cols
+
+def read_plain_chunks(buf: mmap.mmap, usecols: Optional[AbstractSet[str]], chunk_bytes: int) -> Iterator[Table]:
+    """Tables over consecutive blocks of about chunk_bytes of a memory-mapped unquoted CSV."""
+    header_end = buf.find(b'\n')
+    if header_end == -1:
+        header_end = len(buf)
+    columns, positions = column_positions(buf[:header_end].decode('utf-8').split(','), usecols)
+    return plain_blocks(buf, header_end + 1, len(buf), columns, positions, chunk_bytes)
+
+def plain_blocks(buf: mmap.mmap, start: int, stop: int, columns: Tuple[str, ...], positions: List[int],
+                 chunk_bytes: int) -> Iterator[Table]:
+    """Tables over the lines in buf[start:stop] (both on line boundaries), about chunk_bytes at a time."""
+    while True:
+        end = stop if start + chunk_bytes >= stop else buf.rfind(b'\n', start, start + chunk_bytes) + 1
+        if end <= start:
+            # a single line longer than chunk_bytes
+            end = buf.find(b'\n', start + chunk_bytes, stop) + 1 or stop
+        nrows, col_data = split_plain_columns(buf[start:end], positions)
+        yield table_from_columns(columns, col_data, nrows)
+        if end >= stop:
+            return
+        start = end
+
+def read_csv_table(filepath: str) -> Table:
+    if cisv is not None:
+        # SIMD batch parser: trims cells and skips blank lines in C, one call for the whole file
+        raw_rows = cisv.parse_file(filepath, delimiter=',', trim=True, skip_empty_lines=True)
+        header = raw_rows[0] if raw_rows else []
+        # normalize column names once, not per row
+        return build_table(tuple(normalize_colname(c) for c in header), raw_rows[1:])
+    chunks = iter_chunks(filepath, chunksize=None)
+    try:
+        return next(chunks)
+    finally:
+        chunks.close()
+
+def pick_fields(reader: Iterator[List[str]], positions: List[int]) -> Iterator[List[str]]:
+    """Lazily yield the untrimmed fields at positions of each non-blank csv.reader row."""
+    width = max(positions, default=-1) + 1
+    if positions == list(range(width)):
+        # every column: rows go through as read, build_table pads or cuts them
         for raw_row in reader:
-            row = {normalize_colname(k): v.strip() if v is not None else "" for k, v in raw_row.items()}
-            rows.append(row)
-    return rows, [normalize_colname(c) for c in columns]
+            if raw_row:
+                yield raw_row
+        return
+    for raw_row in reader:
+        if raw_row:
+            if len(raw_row) < width:
+                raw_row += [""] * (width - len(raw_row))
+            yield [raw_row[j] for j in positions]
+
+def iter_chunks(filepath: str, chunksize: Optional[int] = CHUNK_ROWS,
+                usecols: Optional[AbstractSet[str]] = None) -> Generator[Table, None, None]:
+    """
+    Stream a CSV file as consecutive Tables, so only one chunk is in memory at a time.
+    chunksize=None reads everything as one Table. Always yields at least one (possibly empty) Table.
+    usecols limits which (normalized) columns are materialized; None keeps all of them.
+
+    Unquoted files are memory-mapped and cut at line boundaries about every CHUNK_BYTES;
+    anything else goes through csv.reader in chunks of chunksize rows.
+    """
+    with open(filepath, 'rb') as fb:
+        if os.fstat(fb.fileno()).st_size > 0:
+            with mmap.mmap(fb.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                if is_plain_csv(buf):
+                    yield from read_plain_chunks(buf, usecols, len(buf) if chunksize is None else CHUNK_BYTES)
+                    return
+
+    with open(filepath, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        # normalize column names once, not per row
+        columns, positions = column_positions(next(reader, []), usecols)
+        rows = pick_fields(reader, positions)
+        chunk = list(islice(rows, chunksize))
+        yield build_table(columns, chunk, trim=True)
+        while chunksize is not None and len(chunk) == chunksize:
+            chunk = list(islice(rows, chunksize))
+            if chunk:
+                yield build_table(columns, chunk, trim=True)
+
+def table_chunks(table_name: str, usecols: Optional[AbstractSet[str]] = None) -> Iterator[Table]:
+    """
+    Tables up to STREAM_MIN_BYTES are loaded whole and cached (see load_csv_table);
+    bigger files are streamed chunk by chunk, materializing only usecols, and never held in memory at once.
+    """
+    filepath = find_table_file(table_name)
+    if os.path.getsize(filepath) < STREAM_MIN_BYTES:
+        yield load_csv_table(table_name)
+    else:
+        yield from iter_chunks(filepath, CHUNK_ROWS, usecols)
 
 # ------------------------ Parsing ------------------------
 
 class ParseError(Exception):
     pass
 
-def parse_select_list(token: str) -> List[str]:
+def parse_select_list(token: str) -> Tuple[str, ...]:
     token = token.strip()
     if token == '*':
-        return ['*']
-    return [p.strip() for p in token.split(',') if p.strip() != '']
+        return ('*',)
+    return tuple(p.strip() for p in token.split(',') if p.strip() != '')
+
+# quoted literal (quotes dropped), run of operator characters, bare word, or (group 5) a stray quote
+_WHERE_TOKEN_RE = re.compile(r"""'([^']*)'|"([^"]*)"|([<>=!]+)|([^\s'"<>=!]+)|(\S)""")
+
+def tokenize_where(where_part: str) -> List[str]:
+    """
+    Split a WHERE clause into words, operators and literals in one regex pass.
+    Quoted literals come back without their quotes; operators need no surrounding spaces.
+    """
+    matches = list(_WHERE_TOKEN_RE.finditer(where_part))
+    if any(m.lastindex == 5 for m in matches):
+        raise ParseError("No closing quotation in WHERE.")
+    return [m.group(m.lastindex or 0) for m in matches]
 
 def parse_where_clause(where_part: str):
     """
     Parse WHERE clause into a list of conditions and operators (AND/OR)
     Returns: [{'col':..., 'op':..., 'val':...}, 'AND', {...}, ...]
+    Conditions and AND/OR must alternate, starting and ending with a condition.
     """
-    tokens = shlex.split(where_part)
-    conditions = []
+    tokens = tokenize_where(where_part)
+    conditions: List[Any] = []
     i = 0
     while i < len(tokens):
         # detect AND / OR
         if tokens[i].upper() in ('AND', 'OR'):
+            if not conditions or isinstance(conditions[-1], str):
+                raise ParseError(f"Unexpected '{tokens[i]}' in WHERE.")
             conditions.append(tokens[i].upper())
             i += 1
             continue
+        if conditions and not isinstance(conditions[-1], str):
+            raise ParseError("Missing AND/OR between WHERE conditions.")
         # find operator in token[i..i+2]
         if i + 2 >= len(tokens):
             raise ParseError("Malformed WHERE condition.")
@@ -84,117 +334,449 @@ def parse_where_clause(where_part: str):
             raise ParseError(f"Invalid operator '{op}' in WHERE.")
         conditions.append({'col': col, 'op': op, 'raw_val': val})
         i += 3
+    if not conditions or isinstance(conditions[-1], str):
+        raise ParseError("Malformed WHERE condition.")
     return conditions
 
-def parse_query(sql: str) -> Dict[str, Any]:
-    original = sql.strip()
-    if original.endswith(';'):
-        original = original[:-1].strip()
-    low = original.lower()
-    if 'select' not in low or ' from ' not in low:
+# SELECT <list> FROM <table> [WHERE <conditions>] [;], split in a single case-insensitive match
+_QUERY_RE = re.compile(r'^\s*SELECT\s+(?P<sel>.+?)\s+FROM\s+(?P<tbl>[^\s;]+)(?:\s+WHERE\s+(?P<where>.+?))?\s*;?\s*$',
+                       re.IGNORECASE | re.DOTALL)
+
+@functools.lru_cache(maxsize=128)
+def parse_query(sql: str) -> Mapping[str, Any]:
+    """
+    Parse one SQL statement. Results are cached per SQL string, so they are returned
+    frozen: the select list and WHERE are tuples, conditions and the result are mapping proxies.
+    """
+    m = _QUERY_RE.match(sql)
+    if m is None:
         raise ParseError("Query must contain SELECT and FROM clauses.")
-    
-    sel_pos = low.find('select')
-    from_pos = low.find(' from ')
-    select_part = original[sel_pos + len('select'):from_pos].strip()
-    remaining = original[from_pos + len(' from '):].strip()
+    select_part, table_part, where_part = m.group('sel', 'tbl', 'where')
 
     where_clause = None
-    where_index = remaining.lower().find(' where ')
-    if where_index != -1:
-        table_part = remaining[:where_index].strip()
-        where_part = remaining[where_index + len(' where '):].strip()
-        where_clause = parse_where_clause(where_part)
-    else:
-        table_part = remaining.strip()
+    if where_part is not None:
+        where_clause = tuple(c if isinstance(c, str) else MappingProxyType(c) for c in parse_where_clause(where_part))
 
     select_list = parse_select_list(select_part)
-    return {'select': select_list, 'from': table_part, 'where': where_clause, 'raw_sql': sql}
+    return MappingProxyType({'select': select_list, 'from': table_part, 'where': where_clause, 'raw_sql': sql})
 
 # ------------------------ WHERE Evaluation ------------------------
 
-def compare_values(left_raw: str, op: str, right_raw: str) -> bool:
-    left = try_parse_number(left_raw)
-    right = try_parse_number(right_raw)
-    numeric_types = (int, float)
-    if isinstance(left, numeric_types) and isinstance(right, numeric_types):
-        if op == '=': return left == right
-        if op == '!=': return left != right
-        if op == '<': return left < right
-        if op == '>': return left > right
-        if op == '<=': return left <= right
-        if op == '>=': return left >= right
-    else:
-        left_s = str(left).strip().lower()
-        right_s = str(right).strip().lower()
-        if op == '=': return left_s == right_s
-        if op == '!=': return left_s != right_s
-        if op == '<': return left_s < right_s
-        if op == '>': return left_s > right_s
-        if op == '<=': return left_s <= right_s
-        if op == '>=': return left_s >= right_s
-    return False
-
-def evaluate_conditions(row: Dict[str, Any], conditions: list) -> bool:
-    """
-    Evaluate a list of conditions with AND/OR
-    conditions = [cond1, 'AND', cond2, 'OR', cond3, ...]
-    """
-    if not conditions:
-        return True
-    result = None
-    i = 0
-    while i < len(conditions):
-        cond = conditions[i]
-        if isinstance(cond, dict):
-            res = compare_values(row[normalize_colname(cond['col'])], cond['op'], unquote_value(cond['raw_val']))
-            if result is None:
-                result = res
-            else:
-                # last operator is stored in prev_op
-                if prev_op == 'AND':
-                    result = result and res
-                elif prev_op == 'OR':
-                    result = result or res
+_PY_OPS = {'=': '==', '!=': '!=', '<': '<', '>': '>', '<=': '<=', '>=': '>='}
+_NUMERIC = (int, float)
+
+def build_plan(conditions: Optional[Sequence[Any]]) -> tuple:
+    """
+    Resolve everything in a parsed WHERE that does not depend on the rows, once per query.
+    Returns a tuple of (norm_col, op, literal, literal_is_numeric, col) steps interleaved with 'AND'/'OR',
+    col being the column name as written in the query, for error messages.
+    """
+    plan: List[Any] = []
+    for cond in conditions or ():
+        if isinstance(cond, str):
+            # it's 'AND' or 'OR'
+            plan.append(cond)
         else:
+            literal = try_parse_number(unquote_value(cond['raw_val']))
+            plan.append((normalize_colname(cond['col']), cond['op'], literal, isinstance(literal, (int, float)),
+                         cond['col']))
+    return tuple(plan)
+
+def step_mode(kind: str, literal_is_numeric: bool) -> str:
+    """
+    How one condition compares its column: 'num' compares numbers directly, 'mixed' checks each
+    cell's type first, 'str' compares lowercased text. Numbers only compare numerically with numbers.
+    """
+    if literal_is_numeric and kind in ('num', 'mixed'):
+        return kind
+    return 'str'
+
+def where_tree(plan: tuple):
+    """
+    Fold a WHERE plan into a tree with the same left-to-right meaning. Leaves are indexes of the
+    plan's conditions; runs of the same operator become one (op, [children]) node, whose children
+    may then be evaluated in any order. None if there are no conditions.
+    """
+    tree: Any = None
+    prev_op = None
+    k = 0
+    for step in plan:
+        if not isinstance(step, tuple):
             # it's 'AND' or 'OR'
-            prev_op = cond
-        i += 1
-    return result
+            prev_op = step
+            continue
+        if tree is None:
+            tree = k
+        elif isinstance(tree, tuple) and tree[0] == prev_op:
+            tree[1].append(k)
+        else:
+            # parse_where_clause guarantees an AND/OR between any two conditions
+            tree = (prev_op, [tree, k])
+        k += 1
+    return tree
+
+def order_by_selectivity(node, rates: List[float]):
+    """
+    Reorder the children of every AND/OR node so Python's short-circuit does the least work:
+    rarely-true conditions first under AND, usually-true ones first under OR.
+    rates[k] is the sampled fraction of rows passing condition k. Returns (node, rate).
+    """
+    if not isinstance(node, tuple):
+        return node, rates[node]
+    op, children = node
+    ranked = sorted((order_by_selectivity(c, rates) for c in children), key=itemgetter(1), reverse=(op == 'OR'))
+    miss = 1.0
+    for _, r in ranked:
+        miss *= (1.0 - r) if op == 'OR' else r
+    return (op, [c for c, _ in ranked]), (1.0 - miss if op == 'OR' else miss)
+
+@functools.lru_cache(maxsize=128)
+def compile_where(shape: tuple) -> Callable[[list, list, list], List[bool]]:
+    """
+    Generate a predicate for one WHERE shape: a (column_slot, op, mode, k) condition or an
+    (op, children) AND/OR node, k indexing the literals. Besides the step_mode modes, mode 'in'
+    tests the cell for membership in literal k, a precomputed set of matching cells, and mode 'str'
+    columns are passed already lowercased (see fold_cells). Literals are not part of the shape, so
+    queries that only differ in constants share the compiled function. It is called as
+    fn(columns, literals, lowered_literals) and evaluates a row in one fused expression,
+    short-circuiting with Python's own and/or.
+    """
+    slots, literals = set(), set()
+
+    def emit(node) -> str:
+        if isinstance(node[0], str):
+            op, children = node
+            return "(" + f" {op.lower()} ".join(emit(c) for c in children) + ")"
+        slot, op, mode, k = node
+        slots.add(slot)
+        literals.add(k)
+        v, py_op = f"v{slot}", _PY_OPS[op]
+        if mode == 'num':
+            return f"{v} {py_op} lit{k}"
+        if mode == 'in':
+            return f"{v} in lit{k}"
+        if mode == 'mixed':
+            return f"({v} {py_op} lit{k} if isinstance({v}, _NUMERIC) else str({v}).lower() {py_op} low{k})"
+        return f"{v} {py_op} low{k}"
+
+    expr = emit(shape)
+    used = sorted(slots)
+    if len(used) == 1:
+        loop = f"for v{used[0]} in cols[{used[0]}]"
+    else:
+        loop = f"for {', '.join(f'v{j}' for j in used)} in zip({', '.join(f'cols[{j}]' for j in used)})"
+    src = "def where_fn(cols, lits, lows):\n"
+    src += "".join(f"    lit{k}, low{k} = lits[{k}], lows[{k}]\n" for k in sorted(literals))
+    src += f"    return [{expr} {loop}]\n"
+    namespace: Dict[str, Any] = {'_NUMERIC': _NUMERIC}
+    exec(compile(src, '<where>', 'exec'), namespace)
+    return namespace['where_fn']
+
+def distinct_cells(table: Table, norm_col: str) -> Optional[Tuple[Tuple[str, ...], Tuple[Any, ...]]]:
+    """
+    A column's distinct cell texts with their parsed values, or None if more than
+    DISTINCT_MAX_RATIO of its cells are distinct. Computed once per cached table.
+    """
+    if table.distinct is not None and norm_col in table.distinct:
+        return table.distinct[norm_col]
+    cells = tuple(set(table.data[norm_col]))
+    known = (cells, parse_column(cells)) if len(cells) <= DISTINCT_MAX_RATIO * table.nrows else None
+    if table.distinct is not None:
+        table.distinct[norm_col] = known
+    return known
+
+def build_mask(table: Table, plan: tuple, tree: Any = None) -> List[bool]:
+    """
+    Evaluate a WHERE plan (see build_plan) over the whole table with a compiled predicate.
+    tree defaults to where_tree(plan); callers may pass a subtree of it instead.
+    Comparisons on 'mixed' columns with few distinct cells are resolved per distinct cell up front.
+    On tables bigger than SELECTIVITY_SAMPLE rows, AND/OR operands are first reordered by how
+    selective each condition is on an evenly spaced sample. Returns one bool per row.
+    """
+    if not plan:
+        return [True] * table.nrows
+    if tree is None:
+        tree = where_tree(plan)
+    if tree is None:
+        return [False] * table.nrows
+    slots: Dict[Tuple[str, str], int] = {}
+    conds: List[Tuple[int, str, str, int]] = []
+    cols: List[Sequence[Any]] = []
+    lits: List[Any] = []
+    lows: List[str] = []
+
+    def slot(norm_col: str, source: str) -> int:
+        # source is the Table field the column comes from: 'values', 'folded' or 'data'
+        if (norm_col, source) not in slots:
+            slots[(norm_col, source)] = len(cols)
+            cols.append(folded_column(table, norm_col) if source == 'folded' else getattr(table, source)[norm_col])
+        return slots[(norm_col, source)]
+
+    for step in plan:
+        if not isinstance(step, tuple):
+            continue
+        norm_col, op, literal, literal_is_numeric, _ = step
+        mode = step_mode(table.kinds[norm_col], literal_is_numeric)
+        k = len(conds)
+        lits.append(literal)
+        lows.append(str(literal).strip().lower())
+        if mode == 'mixed':
+            known = distinct_cells(table, norm_col)
+            if known is not None:
+                # dictionary-style evaluation: run the type check and comparison once per distinct
+                # cell text, then each row is a single set lookup on its raw text
+                cells, parsed = known
+                hits = compile_where((0, op, mode, 0))([parsed], [literal], [lows[k]])
+                lits[k] = frozenset(compress(cells, hits))
+                conds.append((slot(norm_col, 'data'), op, 'in', k))
+                continue
+        conds.append((slot(norm_col, 'folded' if mode == 'str' else 'values'), op, mode, k))
+
+    if isinstance(tree, tuple) and table.nrows > SELECTIVITY_SAMPLE:
+        sample = range(0, table.nrows, table.nrows // SELECTIVITY_SAMPLE)
+        sample_cols = [[col[i] for i in sample] for col in cols]
+        rates = [sum(compile_where(c)(sample_cols, lits, lows)) / len(sample) for c in conds]
+        tree, _ = order_by_selectivity(tree, rates)
+
+    def shape_of(node):
+        if isinstance(node, tuple):
+            return (node[0], tuple(shape_of(c) for c in node[1]))
+        return conds[node]
+
+    return compile_where(shape_of(tree))(cols, lits, lows)
+
+def row_index(table: Table, norm_col: str, key: str) -> Dict[Any, List[int]]:
+    """
+    Equality index of one column, built on first use and kept with the cached table.
+    key 'num' maps each numeric cell's value to its rows (1 and 1.0 share a bucket, as they
+    compare equal); key 'text' maps every cell's lowercased text, str(value).lower(), to its rows.
+    """
+    assert table.indexes is not None
+    index = table.indexes.get((norm_col, key))
+    if index is None:
+        index = {}
+        if key == 'text':
+            for i, text in enumerate(folded_column(table, norm_col)):
+                index.setdefault(text, []).append(i)
+        else:
+            for i, v in enumerate(table.values[norm_col]):
+                if isinstance(v, _NUMERIC):
+                    index.setdefault(v, []).append(i)
+        table.indexes[(norm_col, key)] = index
+    return index
+
+# row_index keys index_lookup needs per step_mode
+_INDEX_KEYS = {'num': ('num',), 'str': ('text',), 'mixed': ('num', 'text')}
+
+def has_index(table: Table, norm_col: str, literal_is_numeric: bool) -> bool:
+    """True if index_lookup can answer norm_col = literal without building an index first."""
+    assert table.indexes is not None
+    keys = _INDEX_KEYS[step_mode(table.kinds[norm_col], literal_is_numeric)]
+    return all((norm_col, key) in table.indexes for key in keys)
+
+def index_lookup(table: Table, norm_col: str, literal: Any, literal_is_numeric: bool) -> List[int]:
+    """Rows where norm_col = literal, in table order, answered from the column's equality index."""
+    mode = step_mode(table.kinds[norm_col], literal_is_numeric)
+    if mode == 'num':
+        return row_index(table, norm_col, 'num').get(literal, [])
+    text = row_index(table, norm_col, 'text').get(str(literal).strip().lower(), [])
+    if mode == 'str':
+        return text
+    # mixed: numeric cells match by value, the others by text
+    values = table.values[norm_col]
+    rows = set(row_index(table, norm_col, 'num').get(literal, []))
+    rows.update(i for i in text if not isinstance(values[i], _NUMERIC))
+    return sorted(rows)
+
+def take_rows(table: Table, rows: List[int], columns: AbstractSet[str]) -> Table:
+    """A new Table with only the given rows and columns; not indexed."""
+    def take(col: Sequence[Any]) -> List[Any]:
+        return [col[i] for i in rows]
+    return Table(tuple(c for c in table.columns if c in columns), len(rows),
+                 MappingProxyType({c: take(table.data[c]) for c in columns}),
+                 MappingProxyType({c: take(table.values[c]) for c in columns}),
+                 table.kinds,
+                 MappingProxyType({c: take(table.folded[c]) for c in columns if c in table.folded}))
+
+def indexed_rows(table: Table, plan: tuple) -> Optional[List[int]]:
+    """
+    Rows matching a WHERE plan on an indexed (cached) table whose WHERE is a single '=' or an
+    AND chain containing one: the smallest matching index bucket, with the other conditions
+    only evaluated on that bucket's rows. None if the plan cannot be answered from an index.
+    Only '=' columns already indexed are probed; if there are none, an index is built for the
+    first '=' only, so a query never builds more than one. The result may be an index bucket
+    itself and must not be modified.
+    """
+    tree = where_tree(plan) if plan else None
+    if table.indexes is None or tree is None:
+        return None
+    leaves = [tree] if not isinstance(tree, tuple) else tree[1] if tree[0] == 'AND' else []
+    conds = [step for step in plan if isinstance(step, tuple)]
+    equals = [k for k in leaves if not isinstance(k, tuple) and conds[k][1] == '=']
+    if not equals:
+        return None
+    indexed = [k for k in equals if has_index(table, conds[k][0], conds[k][3])]
+    probes = [(index_lookup(table, conds[k][0], conds[k][2], conds[k][3]), k) for k in indexed or equals[:1]]
+    rows, probed = min(probes, key=lambda p: len(p[0]))
+    rest = [c for c in leaves if c != probed]
+    if not rows or not rest:
+        return rows
+    subset = take_rows(table, rows, {c[0] for c in conds})
+    return list(compress(rows, build_mask(subset, plan, ('AND', rest))))
+
+def filter_rows(table: Table, plan: tuple) -> List[int]:
+    """Indexes of the rows matching a WHERE plan: from an index (see indexed_rows), else a full scan through build_mask."""
+    rows = indexed_rows(table, plan)
+    if rows is not None:
+        return list(rows)
+    return list(compress(range(table.nrows), build_mask(table, plan)))
+
+def count_rows(table: Table, plan: tuple) -> int:
+    """Number of rows matching a WHERE plan, counted without building their index list."""
+    if not plan:
+        return table.nrows
+    rows = indexed_rows(table, plan)
+    if rows is not None:
+        return len(rows)
+    return build_mask(table, plan).count(True)
 
 # ------------------------ Execution ------------------------
 
-def execute_query(parsed: Dict[str, Any]) -> List[Dict[str, Any]]:
-    table_name = parsed['from']
-    rows, columns = load_csv_table(table_name)
-    filtered = [r for r in rows if evaluate_conditions(r, parsed['where'])]
+def check_columns(columns: AbstractSet[str], plan: tuple, names: List[Tuple[str, str]]):
+    """
+    Fail before any row is touched if the WHERE plan or the (name, norm_col) pairs
+    of the select list refer to a column not among the table's columns.
+    """
+    for step in plan:
+        if isinstance(step, tuple) and step[0] not in columns:
+            raise KeyError(f"Column '{step[4]}' not found.")
+    for name, norm_col in names:
+        if norm_col not in columns:
+            raise KeyError(f"Column '{name}' not found.")
+
+def resolve_select(columns: Sequence[str], plan: tuple, sel: Sequence[str],
+                   norm_sel: List[str]) -> Tuple[Sequence[str], List[str]]:
+    """Check the query against the table's columns and expand '*'; returns (out_cols, norm_cols)."""
+    # COUNT(missing) is simply 0, so only WHERE and plain select columns must exist
+    check_columns(set(columns), plan, list(zip(sel, norm_sel)))
+    if tuple(sel) == ('*',):
+        norm_cols = list(dict.fromkeys(columns))
+        return norm_cols, norm_cols
+    return sel, norm_sel
+
+def project_rows(table: Table, out_cols: Sequence[str], norm_cols: Sequence[str], idx: List[int]) -> List[Dict[str, Any]]:
+    """Project selected columns; dicts are only built for rows that survived the filter"""
+    sources = [table.data[c] for c in norm_cols]
+    return [dict(zip(out_cols, [src[i] for src in sources])) for i in idx]
+
+# per-COUNT counts and projected rows of a scanned chunk; COUNT queries only fill the former
+ScanResult = Tuple[List[int], List[Dict[str, Any]]]
+
+def scan_chunk(table: Table, plan: tuple, out_cols: Sequence[str], norm_cols: Sequence[str],
+               count_cols: Optional[List[Optional[str]]]) -> ScanResult:
+    if count_cols is None:
+        return [], project_rows(table, out_cols, norm_cols, filter_rows(table, plan))
+    if all(norm_col is None for norm_col in count_cols):
+        # only COUNT(*): nothing but the number of matching rows is needed
+        return [count_rows(table, plan)] * len(count_cols), []
+    # COUNT(col) counts the non-empty cells of the matching rows; idx None means every row
+    idx = filter_rows(table, plan) if plan else None
+    counts: List[int] = []
+    for norm_col in count_cols:
+        if norm_col is None:
+            counts.append(table.nrows if idx is None else len(idx))
+        elif norm_col not in table.data:
+            counts.append(0)
+        else:
+            col = table.data[norm_col]
+            cells = col if idx is None else list(map(col.__getitem__, idx))
+            counts.append(len(cells) - cells.count(''))
+    return counts, []
+
+def merge_results(results: Iterable[ScanResult], n_counts: int) -> ScanResult:
+    """Sum the counts and concatenate the rows of chunk results, in order."""
+    counts = [0] * n_counts
+    rows: List[Dict[str, Any]] = []
+    for chunk_counts, chunk_rows in results:
+        for j, c in enumerate(chunk_counts):
+            counts[j] += c
+        rows.extend(chunk_rows)
+    return counts, rows
+
+def scan_plain_range(filepath: str, start: int, stop: int, columns: Tuple[str, ...], positions: List[int],
+                     plan: tuple, out_cols: Sequence[str], norm_cols: Sequence[str],
+                     count_cols: Optional[List[Optional[str]]], chunk_bytes: int) -> ScanResult:
+    """Worker process: parse and filter the lines in bytes [start, stop) of an unquoted CSV file."""
+    with open(filepath, 'rb') as fb, mmap.mmap(fb.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        return merge_results([scan_chunk(table, plan, out_cols, norm_cols, count_cols)
+                              for table in plain_blocks(buf, start, stop, columns, positions, chunk_bytes)],
+                             len(count_cols or ()))
 
+def scan_parallel(filepath: str, usecols: Optional[AbstractSet[str]], plan: tuple, sel: Sequence[str],
+                  norm_sel: List[str], count_cols: Optional[List[Optional[str]]]) -> Optional[ScanResult]:
+    """
+    Cut an unquoted file into SCAN_WORKERS line-aligned byte ranges that are parsed and filtered
+    in separate processes, so only matching rows / counts travel back. None if it must be read serially.
+    """
+    with open(filepath, 'rb') as fb:
+        if os.fstat(fb.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(fb.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            header_end = buf.find(b'\n')
+            if header_end == -1 or not is_plain_csv(buf):
+                return None
+            columns, positions = column_positions(buf[:header_end].decode('utf-8').split(','), usecols)
+            bounds = [header_end + 1]
+            for w in range(1, SCAN_WORKERS):
+                target = header_end + 1 + (len(buf) - header_end - 1) * w // SCAN_WORKERS
+                bounds.append(buf.find(b'\n', max(target, bounds[-1])) + 1 or len(buf))
+            bounds.append(len(buf))
+    out_cols, norm_cols = resolve_select(columns, plan, sel, norm_sel)
+    with ProcessPoolExecutor(SCAN_WORKERS) as pool:
+        futures = [pool.submit(scan_plain_range, filepath, start, stop, columns, positions,
+                               plan, out_cols, norm_cols, count_cols, CHUNK_BYTES)
+                   for start, stop in zip(bounds, bounds[1:]) if start < stop]
+        return merge_results([f.result() for f in futures], len(count_cols or ()))
+
+def scan_table(table_name: str, usecols: Optional[AbstractSet[str]], plan: tuple, sel: Sequence[str],
+               norm_sel: List[str], count_cols: Optional[List[Optional[str]]]) -> ScanResult:
+    """Filter the whole table chunk by chunk; big unquoted files are split across SCAN_WORKERS processes."""
+    filepath = find_table_file(table_name)
+    if SCAN_WORKERS > 1 and os.path.getsize(filepath) >= STREAM_MIN_BYTES:
+        merged = scan_parallel(filepath, usecols, plan, sel, norm_sel, count_cols)
+        if merged is not None:
+            return merged
+    results: List[ScanResult] = []
+    out_cols: Sequence[str] = sel
+    norm_cols: Sequence[str] = norm_sel
+    for n_chunk, table in enumerate(table_chunks(table_name, usecols)):
+        if n_chunk == 0:
+            out_cols, norm_cols = resolve_select(table.columns, plan, sel, norm_sel)
+        results.append(scan_chunk(table, plan, out_cols, norm_cols, count_cols))
+    return merge_results(results, len(count_cols or ()))
+
+def execute_query(parsed: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    plan = build_plan(parsed['where'])
     sel = parsed['select']
-    if sel == ['*']:
-        return filtered
-
-    # Check COUNT
-    if any(s.lower().startswith('count(') for s in sel):
-        results = []
-        for s in sel:
-            inner = s[s.find('(')+1:s.find(')')].strip()
-            if inner == '*':
-                results.append({'expr': 'COUNT(*)', 'count': len(filtered)})
-            else:
-                c = sum(1 for r in filtered if r.get(normalize_colname(inner), '').strip() != '')
-                results.append({'expr': f'COUNT({inner})', 'count': c})
-        return results
-
-    # Project selected columns
-    projected = []
-    for r in filtered:
-        row_out = {}
-        for col in sel:
-            norm_col = normalize_colname(col)
-            if norm_col not in r:
-                raise KeyError(f"Column '{col}' not found.")
-            row_out[col] = r[norm_col]
-        projected.append(row_out)
+
+    # Check COUNT; column names are normalized once here, not per chunk or row
+    count_args: Optional[List[str]] = None
+    count_cols: Optional[List[Optional[str]]] = None
+    if sel != ('*',) and any(s.lower().startswith('count(') for s in sel):
+        count_args = [s[s.find('(')+1:s.find(')')].strip() for s in sel]
+        count_cols = [None if inner == '*' else normalize_colname(inner) for inner in count_args]
+    norm_sel = [] if sel == ('*',) or count_args is not None else [normalize_colname(c) for c in sel]
+
+    # columns a streamed table has to materialize; None means all of them
+    usecols: Optional[Set[str]] = None
+    if sel != ('*',):
+        usecols = {step[0] for step in plan if isinstance(step, tuple)}
+        usecols.update(c for c in count_cols or () if c is not None)
+        usecols.update(norm_sel)
+
+    counts, projected = scan_table(parsed['from'], usecols, plan, sel, norm_sel, count_cols)
+    if count_args is not None:
+        return [{'expr': f'COUNT({inner})', 'count': c} for inner, c in zip(count_args, counts)]
     return projected
 
 # ------------------------ Pretty Print ------------------------
@@ -203,16 +785,22 @@ def print_results(rows: List[Dict[str, Any]]):
     if not rows:
         print("(no rows)")
         return
+    out = io.StringIO()
     if all('expr' in r and 'count' in r for r in rows):
         for r in rows:
-            print(f"{r['expr']}: {r['count']}")
+            out.write(f"{r['expr']}: {r['count']}\n")
+        sys.stdout.write(out.getvalue())
         return
     cols = list(rows[0].keys())
-    widths = {c: max(len(str(c)), max(len(str(r.get(c,''))) for r in rows)) for c in cols}
-    print(" | ".join(c.ljust(widths[c]) for c in cols))
-    print("-+-".join('-'*widths[c] for c in cols))
-    for r in rows:
-        print(" | ".join(str(r.get(c,'')).ljust(widths[c]) for c in cols))
+    # one str() per cell, kept for rendering; widths come from the same strings
+    str_cols = [[str(r.get(c, '')) for r in rows] for c in cols]
+    widths = [max(len(str(c)), max(map(len, cells))) for c, cells in zip(cols, str_cols)]
+    out.write(" | ".join(map(str.ljust, cols, widths)) + "\n")
+    out.write("-+-".join('-' * w for w in widths) + "\n")
+    for line in (zip(*str_cols) if cols else [()] * len(rows)):
+        out.write(" | ".join(map(str.ljust, line, widths)) + "\n")
+    # a single write instead of one print (and stdout lock) per row
+    sys.stdout.write(out.getvalue())
 
 # ------------------------ CLI ------------------------
 